@@ -30,13 +30,15 @@ def dumplist(args):
   from .query import Database
   db = Database()
 
-  r = db.objects(
+  r = db.paths_for(
       protocol=args.protocol,
       purposes=args.purpose,
       model_ids=args.model_id,
       groups=args.group,
       languages=args.language,
-      classes=args.sclass
+      classes=args.sclass,
+      prefix=args.directory,
+      suffix=args.extension
   )
 
   output = sys.stdout
@@ -44,8 +46,8 @@ def dumplist(args):
     from bob.db.base.utils import null
     output = null()
 
-  for f in r:
-    output.write('%s\n' % (f.make_path(args.directory, args.extension),))
+  for path in r:
+    output.write('%s\n' % (path,))
 
   return 0
 
@@ -21,7 +21,7 @@
 
 import os, numpy
 import bob.db.base.utils
-from sqlalchemy import Table, Column, Integer, String, ForeignKey, or_, and_
+from sqlalchemy import Table, Column, Integer, String, ForeignKey, Index, or_, and_
 from bob.db.base.sqlalchemy_migration import Enum, relationship
 from sqlalchemy.orm import backref
 from sqlalchemy.ext.declarative import declarative_base
@@ -31,13 +31,29 @@ Base = declarative_base()
 import bob.db.base
 
 
+# the separators after which os.path.join() does not add one
+_SEPARATORS = (os.sep, os.altsep) if os.altsep else os.sep
+
+
+def _path_prefix(directory):
+  """Returns the bit to prepend to the stored paths to place them in the given
+     directory. The stored paths are relative, so a plain concatenation is
+     equivalent to os.path.join()."""
+  if not directory:
+    return ''
+  directory = os.fspath(directory)
+  if directory.endswith(_SEPARATORS):
+    return directory
+  return directory + os.sep
+
+
 subworld_client_association = Table('subworld_client_association', Base.metadata,
-  Column('subworld_id', Integer, ForeignKey('subworld.id')),
-  Column('client_id',  Integer, ForeignKey('client.id')))
+  Column('subworld_id', Integer, ForeignKey('subworld.id'), index=True),
+  Column('client_id',  Integer, ForeignKey('client.id'), index=True))
 
 protocolPurpose_file_association = Table('protocolPurpose_file_association', Base.metadata,
-  Column('protocolPurpose_id', Integer, ForeignKey('protocolPurpose.id')),
-  Column('file_id',  Integer, ForeignKey('file.id')))
+  Column('protocolPurpose_id', Integer, ForeignKey('protocolPurpose.id'), index=True),
+  Column('file_id',  Integer, ForeignKey('file.id'), index=True))
 
 class Client(Base):
   """Database clients, marked by an integer identifier and the group they belong to"""
@@ -46,12 +62,14 @@ class Client(Base):
 
   # Key identifier for the client
   id = Column(Integer, primary_key=True)
+  # The enumerated columns of this file are stored as strings, as in the
+  # published db.sql3 files, which must remain readable
   # Gender to which the client belongs to
   gender_choices = ('m','f')
-  gender = Column(Enum(*gender_choices))
+  gender = Column(Enum(*gender_choices), index=True)
   # Group to which the client belongs to
   group_choices = ('g1','g2','world')
-  sgroup = Column(Enum(*group_choices)) # do NOT use group (SQL keyword)
+  sgroup = Column(Enum(*group_choices), index=True) # do NOT use group (SQL keyword)
   # Language spoken by the client
   language_choices = ('en',)
   language = Column(Enum(*language_choices))
@@ -76,8 +94,9 @@ class Subworld(Base):
   # Subworld to which the client belongs to
   name = Column(String(20), unique=True)
 
-  # for Python: A direct link to the client
-  clients = relationship("Client", secondary=subworld_client_association, backref=backref("subworld", order_by=id))
+  # for Python: A direct link to the client; the clients of all the loaded
+  # subworlds are loaded at once, with a single query
+  clients = relationship("Client", secondary=subworld_client_association, backref=backref("subworld", order_by=id), lazy='selectin')
 
   def __init__(self, name):
     self.name = name
@@ -89,6 +108,11 @@ class File(Base, bob.db.base.File):
   """Generic file container"""
 
   __tablename__ = 'file'
+  # the columns by which the queries sort the files; its leading column serves
+  # the lookups of the files of given clients (e.g. of the selected models).
+  # The protocol-wide queries still reach the files through the association
+  # table and sort them in a temporary B-tree
+  __table_args__ = (Index('ix_file_order', 'client_id', 'session_id', 'claimed_id', 'shot_id'),)
 
   # Key identifier for the file
   id = Column(Integer, primary_key=True)
@@ -97,11 +121,11 @@ class File(Base, bob.db.base.File):
   # Unique path to this file inside the database
   path = Column(String(100), unique=True)
   # Identifier of the claimed client associated with this file
-  claimed_id = Column(Integer) # not always the id of an existing client model -> not a ForeignKey
+  claimed_id = Column(Integer, index=True) # not always the id of an existing client model -> not a ForeignKey
   # Identifier of the shot
   shot_id = Column(Integer)
   # Identifier of the session
-  session_id = Column(Integer)
+  session_id = Column(Integer, index=True)
 
   # For Python: A direct link to the client object that this file belongs to
   real_client = relationship("Client", backref=backref("files", order_by=id))
@@ -116,13 +140,30 @@ class File(Base, bob.db.base.File):
     self.shot_id = shot_id
     self.session_id = session_id
 
+  def make_path(self, directory=None, extension=None):
+    """Wraps the current path so that a complete path is formed
+
+    Keyword Parameters:
+
+    directory
+      An optional directory name that will be prefixed to the returned result.
+
+    extension
+      An optional extension that will be suffixed to the returned filename. The
+      extension normally includes the leading ``.`` character as in ``.jpg`` or
+      ``.hdf5``.
+
+    Returns a string containing the newly generated file path.
+    """
+    return _path_prefix(directory) + self.path + (extension or '')
+
 class Annotation(Base):
   """Annotations of the BANCA database consists only of the left and right eye positions.
   There is exactly one annotation for each file."""
   __tablename__ = 'annotation'
 
   id = Column(Integer, primary_key=True)
-  file_id = Column(Integer, ForeignKey('file.id'))
+  file_id = Column(Integer, ForeignKey('file.id'), index=True)
 
   le_x = Column(Integer) # left eye
   le_y = Column(Integer)
@@ -170,13 +211,13 @@ class ProtocolPurpose(Base):
   # Unique identifier for this protocol purpose object
   id = Column(Integer, primary_key=True)
   # Id of the protocol associated with this protocol purpose object
-  protocol_id = Column(Integer, ForeignKey('protocol.id')) # for SQL
+  protocol_id = Column(Integer, ForeignKey('protocol.id'), index=True) # for SQL
   # Group associated with this protocol purpose object
   group_choices = ('world', 'dev', 'eval')
-  sgroup = Column(Enum(*group_choices))
+  sgroup = Column(Enum(*group_choices), index=True)
   # Purpose associated with this protocol purpose object
   purpose_choices = ('train', 'enroll', 'probe')
-  purpose = Column(Enum(*purpose_choices))
+  purpose = Column(Enum(*purpose_choices), index=True)
 
   # For Python: A direct link to the Protocol object that this ProtocolPurpose belongs to
   protocol = relationship("Protocol", backref=backref("purposes", order_by=id))
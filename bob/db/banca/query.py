@@ -21,14 +21,115 @@ BANCA database in the most obvious ways.
 """
 
 import os
+import sqlite3
+from collections.abc import Iterable
 import six
+from six.moves.urllib.request import pathname2url
+from sqlalchemy import bindparam, create_engine, event, exists
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import contains_eager, selectinload, scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 from bob.db.base import utils
 from .models import *
+from .models import _path_prefix
 from .driver import Interface
 import bob.db.base
 
 SQLITE_FILE = Interface().files()[0]
 
+# cache of the compiled queries, shared by all Database objects
+_bakery = baked.bakery()
+
+# client groups corresponding to the protocol groups
+_GROUP_ALIASES = {'dev': 'g1', 'eval': 'g2'}
+
+# sets of valid values, to check the parameters of the queries against
+_VALID_GROUPS = frozenset(ProtocolPurpose.group_choices)
+_VALID_NORM_GROUPS = frozenset(('dev', 'eval'))
+_VALID_PURPOSES = frozenset(ProtocolPurpose.purpose_choices)
+_VALID_CLIENT_GROUPS = frozenset(Client.group_choices)
+_VALID_NORM_CLIENT_GROUPS = frozenset(('g1', 'g2'))
+_VALID_GENDERS = frozenset(Client.gender_choices)
+_VALID_LANGUAGES = frozenset(Client.language_choices)
+_VALID_CLASSES = frozenset(('client', 'impostor'))
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+  """Tunes every new connection to the (read-only) SQLite database file"""
+  cursor = dbapi_connection.cursor()
+  cursor.execute("PRAGMA query_only = 1")
+  cursor.execute("PRAGMA mmap_size = 268435456")  # 256 MB
+  cursor.execute("PRAGMA cache_size = -65536")  # 64 MB
+  cursor.execute("PRAGMA temp_store = MEMORY")
+  cursor.close()
+
+
+def _session_readonly(sqlite_file):
+  """Opens the given SQLite file in read-only mode, with one session (and
+     connection) per thread, so that several threads can query the database
+     concurrently"""
+  uri = 'file:%s?mode=ro&immutable=1' % pathname2url(os.path.abspath(sqlite_file))
+  # each session keeps its connection for as long as its thread lives, so the
+  # number of connections must not be capped; connections to the read-only,
+  # immutable file are cheap to open
+  engine = create_engine('sqlite://', poolclass=NullPool,
+                         creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False))
+  event.listen(engine, 'connect', _set_sqlite_pragmas)
+  return scoped_session(sessionmaker(bind=engine))
+
+
+def _file_criteria(world, subworld, enroll, probe_client, probe_impostor,
+                   models):
+  """Returns the criterion selecting the kinds of files requested in
+     :py:meth:`Database.objects`. The values to select are left as bound
+     parameters, so that the compiled query can be cached and reused."""
+  groups = bindparam('groups', expanding=True)
+  model_ids = bindparam('model_ids', expanding=True)
+  filters = []
+  if world:
+    c = [Client.sgroup == 'world', ProtocolPurpose.sgroup == 'world',
+         Client.language.in_(bindparam('languages', expanding=True))]
+    if subworld:
+      c.append(Subworld.name.in_(bindparam('subworld', expanding=True)))
+    if models:
+      c.append(Client.id.in_(model_ids))
+    filters.append(and_(*c))
+  if enroll:
+    c = [ProtocolPurpose.sgroup.in_(groups), ProtocolPurpose.purpose == 'enroll']
+    if models:
+      c.append(Client.id.in_(model_ids))
+    filters.append(and_(*c))
+  if probe_client:
+    c = [File.client_id == File.claimed_id,
+         ProtocolPurpose.sgroup.in_(groups), ProtocolPurpose.purpose == 'probe']
+    if models:
+      c.append(Client.id.in_(model_ids))
+    filters.append(and_(*c))
+  if probe_impostor:
+    c = [File.client_id != File.claimed_id,
+         ProtocolPurpose.sgroup.in_(groups), ProtocolPurpose.purpose == 'probe']
+    if models:
+      c.append(File.claimed_id.in_(model_ids))
+    filters.append(and_(*c))
+  return or_(*filters)
+
+
+def _client_criteria(world, subworld, others):
+  """Returns the criterion selecting the groups of clients requested in
+     :py:meth:`Database.clients`. The values to select are left as bound
+     parameters, so that the compiled query can be cached and reused."""
+  filters = []
+  if world:
+    if subworld:
+      # only the world clients belong to a subworld
+      filters.append(Subworld.name.in_(bindparam('subworld', expanding=True)))
+    else:
+      filters.append(Client.sgroup == 'world')
+  if others:
+    filters.append(and_(Client.sgroup != 'world',
+                        Client.sgroup.in_(bindparam('groups', expanding=True))))
+  return or_(*filters)
+
 
 class Database(bob.db.base.SQLiteDatabase):
   """The dataset class opens and maintains a connection opened to the Database.
@@ -44,22 +145,50 @@ class Database(bob.db.base.SQLiteDatabase):
     super(Database, self).__init__(SQLITE_FILE, File,
                                    original_directory, original_extension)
 
+    self.__replace_session__()
+
+    # the protocol and subworld tables do not change; their names are only
+    # queried once, on first use
+    self._protocol_names = None
+    self._subworld_names = None
+
+  def __setstate__(self, state):
+    # the base class opens a single connection again when unpickling
+    super(Database, self).__setstate__(state)
+    self.__replace_session__()
+
+  def __replace_session__(self):
+    """Replaces the single connection opened by the base class by the
+       sessions of _session_readonly()"""
+    if self.is_valid():
+      self.m_session.close()
+      self.m_session.bind.dispose()
+      self.m_session = _session_readonly(SQLITE_FILE)
+
   def __group_replace_alias__(self, l):
     """Replace 'dev' by 'g1' and 'eval' by 'g2' in a list of groups, and
        returns the new list"""
     if not l:
       return l
     elif isinstance(l, six.string_types):
-      return self.__group_replace_alias__((l,))
-    l2 = []
-    for val in l:
-      if(val == 'dev'):
-        l2.append('g1')
-      elif(val == 'eval'):
-        l2.append('g2')
-      else:
-        l2.append(val)
-    return tuple(l2)
+      l = (l,)
+    return tuple(_GROUP_ALIASES.get(val, val) for val in l)
+
+  def __check_validity__(self, l, obj, valid, default=None):
+    """Checks validity of user input data against a set of valid values, and
+       returns the given values as a tuple, or the default ones if none are
+       given (by default, the valid values themselves)"""
+    if not l:
+      return valid if default is None else default
+    if isinstance(l, six.string_types):
+      l = (l,)
+    else:
+      l = tuple(l)
+    bad = [k for k in l if k not in valid]
+    if bad:
+      raise ValueError("Invalid %s '%s'. Valid values are %s, or lists/tuples of those" %
+                       (obj, bad[0], ', '.join(sorted(valid))))
+    return l
 
   def groups(self, protocol=None):
     """Returns the names of all registered groups"""
@@ -85,9 +214,9 @@ class Database(bob.db.base.SQLiteDatabase):
   def subworld_names(self):
     """Returns all registered subworld names"""
 
-    l = self.subworlds()
-    retval = [str(k.name) for k in l]
-    return retval
+    if self._subworld_names is None:
+      self._subworld_names = [k for (k,) in self.query(Subworld.name).order_by(Subworld.id)]
+    return list(self._subworld_names)
 
   def subworlds(self):
     """Returns the list of subworlds"""
@@ -97,7 +226,7 @@ class Database(bob.db.base.SQLiteDatabase):
   def has_subworld(self, name):
     """Tells if a certain subworld is available"""
 
-    return self.query(Subworld).filter(Subworld.name == name).count() != 0
+    return self.query(exists().where(Subworld.name == name)).scalar()
 
   def clients(self, protocol=None, groups=None, genders=None, languages=None, subworld=None):
     """Returns a set of clients for the specific query by the user.
@@ -127,37 +256,42 @@ class Database(bob.db.base.SQLiteDatabase):
     """
 
     groups = self.__group_replace_alias__(groups)
-    groups = self.check_parameters_for_validity(
-        groups, "group", self.client_groups())
-    genders = self.check_parameters_for_validity(
-        genders, "gender", self.genders())
-    languages = self.check_parameters_for_validity(
-        languages, "language", self.languages())
-    subworld = self.check_parameters_for_validity(
-        subworld, "subworld", self.subworld_names())
-
-    retval = []
-    # List of the clients
-    if "world" in groups:
-      if len(subworld) == 1:
-        q = self.query(Client).join((Subworld, Client.subworld)
-                                    ).filter(Subworld.name.in_(subworld))
-      else:
-        q = self.query(Client).filter(Client.sgroup == 'world')
-      q = q.filter(Client.gender.in_(genders)).\
-          filter(Client.language.in_(languages)).\
-          order_by(Client.id)
-      retval += list(q)
-
-    if 'g1' in groups or 'g2' in groups:
-      q = self.query(Client).filter(Client.sgroup != 'world').\
-          filter(Client.sgroup.in_(groups)).\
-          filter(Client.gender.in_(genders)).\
-          filter(Client.language.in_(languages)).\
-          order_by(Client.id)
-      retval += list(q)
-
-    return retval
+    groups = self.__check_validity__(
+        groups, "group", _VALID_CLIENT_GROUPS, default=Client.group_choices)
+    genders = self.__check_validity__(
+        genders, "gender", _VALID_GENDERS, default=Client.gender_choices)
+    languages = self.__check_validity__(
+        languages, "language", _VALID_LANGUAGES, default=Client.language_choices)
+    subworld_names = self.subworld_names()
+    subworld = self.__check_validity__(
+        subworld, "subworld", subworld_names)
+
+    # List of the clients, with a single query for all the groups
+    world = "world" in groups
+    split = world and len(subworld) == 1
+    others = 'g1' in groups or 'g2' in groups
+    if not (world or others):
+      return []
+
+    params = {'genders': list(genders), 'languages': list(languages)}
+    if split:
+      params['subworld'] = list(subworld)
+    if others:
+      params['groups'] = list(groups)
+    # the structure of the query, which is part of the key of the cache
+    key = (world, split, others)
+
+    bq = _bakery(lambda s: s.query(Client))
+    if split:
+      bq += lambda q: q.outerjoin((Subworld, Client.subworld))
+    bq.add_criteria(lambda q: q.filter(_client_criteria(*key)), *key)
+    # the world clients come first, as they have always been returned
+    bq += lambda q: q.filter(Client.gender.in_(bindparam('genders', expanding=True))).\
+        filter(Client.language.in_(bindparam('languages', expanding=True))).\
+        distinct().\
+        order_by(Client.sgroup != 'world', Client.id)
+    self.assert_validity()
+    return bq(self.m_session()).params(**params).all()
 
   def tclients(self, protocol=None, groups=None):
     """Returns a set of T-Norm clients for the specific query by the user.
@@ -175,7 +309,8 @@ class Database(bob.db.base.SQLiteDatabase):
     """
 
     groups = self.__group_replace_alias__(groups)
-    groups = self.check_parameters_for_validity(groups, "group", ('g1', 'g2'))
+    groups = self.__check_validity__(
+        groups, "group", _VALID_NORM_CLIENT_GROUPS, default=('g1', 'g2'))
     # g2 clients are used for normalizing g1 ones, etc.
     tgroups = []
     if 'g1' in groups:
@@ -200,7 +335,8 @@ class Database(bob.db.base.SQLiteDatabase):
     """
 
     groups = self.__group_replace_alias__(groups)
-    groups = self.check_parameters_for_validity(groups, "group", ('g1', 'g2'))
+    groups = self.__check_validity__(
+        groups, "group", _VALID_NORM_CLIENT_GROUPS, default=('g1', 'g2'))
     # g2 clients are used for normalizing g1 ones, etc.
     zgroups = []
     if 'g1' in groups:
@@ -278,7 +414,7 @@ class Database(bob.db.base.SQLiteDatabase):
   def has_client_id(self, id):
     """Returns True if we have a client with a certain integer identifier"""
 
-    return self.query(Client).filter(Client.id == id).count() != 0
+    return self.query(exists().where(Client.id == id)).scalar()
 
   def client(self, id):
     """Returns the client object in the database given a certain id. Raises
@@ -286,6 +422,66 @@ class Database(bob.db.base.SQLiteDatabase):
 
     return self.query(Client).filter(Client.id == id).one()
 
+  def paths(self, ids, prefix=None, suffix=None, preserve_order=True):
+    """Returns a full file paths considering particular file ids, a given
+    directory and an extension
+
+    Keyword Parameters:
+
+    ids
+      The ids of the object in the database table "file". This object should
+      be a python iterable (such as a tuple or list).
+
+    prefix
+      The bit of path to be prepended to the filename stem
+
+    suffix
+      The extension determines the suffix that will be appended to the filename
+      stem.
+
+    preserve_order
+      If True (the default), the paths are returned in the order of the given
+      ids; otherwise, they are returned in the order of the database.
+
+    Returns a list (that may be empty) of the fully constructed paths given the
+    file ids. Ids which cannot be found in the database are omitted.
+    """
+
+    ids = list(ids)
+    # paths are built as in File.make_path()
+    prefix = _path_prefix(prefix)
+    suffix = suffix or ''
+    # only the paths are needed, there is no need to build the File objects
+    rows = self.query(File.id, File.path).filter(File.id.in_(ids))
+    if not preserve_order:
+      return [prefix + k + suffix for (_, k) in rows]
+    fmap = dict(rows)
+    return [prefix + fmap[k] + suffix for k in ids if k in fmap]
+
+  def reverse(self, paths, preserve_order=True):
+    """Reverses the lookup: from certain stems, returning file objects
+
+    Keyword Parameters:
+
+    paths
+      The filename stems I'll query for. This object should be a python
+      iterable (such as a tuple or list)
+
+    preserve_order
+      If True (the default), the files are returned in the order of the given
+      paths; otherwise, they are returned in the order of the database.
+
+    Returns a list (that may be empty) of the File objects matching the given
+    stems. Stems which cannot be found in the database are omitted.
+    """
+
+    paths = list(paths)
+    files = self.query(File).filter(File.path.in_(paths))
+    if not preserve_order:
+      return list(files)
+    fmap = dict((f.path, f) for f in files)
+    return [fmap[k] for k in paths if k in fmap]
+
   def get_client_id_from_model_id(self, model_id, **kwargs):
     """Returns the client_id attached to the given model_id
 
@@ -354,76 +550,157 @@ class Database(bob.db.base.SQLiteDatabase):
     Returns: A list of files which have the given properties.
     """
 
-    protocol = self.check_parameters_for_validity(
-        protocol, "protocol", self.protocol_names())
-    purposes = self.check_parameters_for_validity(
-        purposes, "purpose", self.purposes())
-    groups = self.check_parameters_for_validity(groups, "group", self.groups())
-    languages = self.check_parameters_for_validity(
-        languages, "language", self.languages())
-    classes = self.check_parameters_for_validity(
-        classes, "class", ('client', 'impostor'))
-    subworld = self.check_parameters_for_validity(
-        subworld, "subworld", self.subworld_names())
-
-    import collections
+    # the protocol purposes of all the returned files are loaded at once,
+    # with a single additional query
+    result = self.__files_query__(False, protocol, purposes, model_ids, groups,
+                                  classes, languages, subworld,
+                                  load_purposes=True)
+    if result is None:
+      return []
+    return result.all()
+
+  def iter_objects(self, protocol=None, purposes=None, model_ids=None,
+                   groups=None, classes=None, languages=None, subworld=None,
+                   batch_size=1000):
+    """Iterates over the Files for the specific query by the user, which are
+    loaded from the database by batches, instead of all at once.
+
+    Keyword Parameters:
+
+    protocol, purposes, model_ids, groups, classes, languages, subworld
+      See :py:meth:`objects`.
+
+    batch_size
+      The number of files loaded from the database at once.
+
+    Returns: An iterator over the files which have the given properties, in
+    the same order as :py:meth:`objects`.
+    """
+
+    result = self.__files_query__(False, protocol, purposes, model_ids, groups,
+                                  classes, languages, subworld, stream=True)
+    if result is None:
+      return iter(())
+    return iter(result.with_post_criteria(lambda q: q.yield_per(batch_size)))
+
+  def paths_for(self, protocol=None, purposes=None, model_ids=None,
+                groups=None, classes=None, languages=None, subworld=None,
+                prefix=None, suffix=None):
+    """Returns the full paths of the Files for the specific query by the user,
+    as ``self.paths([f.id for f in self.objects(...)], prefix, suffix)``
+    would, but with a single query that only selects the paths.
+
+    Keyword Parameters:
+
+    protocol, purposes, model_ids, groups, classes, languages, subworld
+      See :py:meth:`objects`.
+
+    prefix
+      The bit of path to be prepended to the filename stem
+
+    suffix
+      The extension determines the suffix that will be appended to the filename
+      stem.
+
+    Returns: A list of the paths of the files which have the given properties,
+    in the same order as :py:meth:`objects`.
+    """
+
+    result = self.__files_query__(True, protocol, purposes, model_ids, groups,
+                                  classes, languages, subworld)
+    if result is None:
+      return []
+    # paths are built as in File.make_path()
+    prefix = _path_prefix(prefix)
+    suffix = suffix or ''
+    return [prefix + k + suffix for (k,) in result]
+
+  def __files_query__(self, paths_only, protocol, purposes, model_ids, groups,
+                      classes, languages, subworld, load_purposes=False,
+                      stream=False):
+    """Checks the parameters of :py:meth:`objects`, and returns the query of
+       the requested files (or of their paths only) bound to its parameters,
+       or None if no file can match. With load_purposes, the protocol
+       purposes of the files are loaded together with them. With stream, the
+       query is prepared for yield_per()"""
+
+    protocol_names = self.protocol_names()
+    protocol = self.__check_validity__(
+        protocol, "protocol", protocol_names)
+    purposes = self.__check_validity__(
+        purposes, "purpose", _VALID_PURPOSES, default=ProtocolPurpose.purpose_choices)
+    groups = self.__check_validity__(
+        groups, "group", _VALID_GROUPS, default=ProtocolPurpose.group_choices)
+    languages = self.__check_validity__(
+        languages, "language", _VALID_LANGUAGES, default=Client.language_choices)
+    classes = self.__check_validity__(
+        classes, "class", _VALID_CLASSES, default=('client', 'impostor'))
+    subworld_names = self.subworld_names()
+    subworld = self.__check_validity__(
+        subworld, "subworld", subworld_names)
+
     if(model_ids is None):
       model_ids = ()
-    elif(not isinstance(model_ids, collections.Iterable)):
+    elif(isinstance(model_ids, six.string_types) or not isinstance(model_ids, Iterable)):
       model_ids = (model_ids,)
-
-    # Now query the database
-    retval = []
-    if 'world' in groups:
-      q = self.query(File).join(Client).join(
-          (ProtocolPurpose, File.protocolPurposes)).join(Protocol)
-      if len(subworld) == 1:
-        q = q.join((Subworld, Client.subworld)).filter(
-            Subworld.name.in_(subworld))
-      q = q.filter(Client.sgroup == 'world').\
-          filter(and_(Protocol.name.in_(protocol), ProtocolPurpose.sgroup == 'world')).\
-          filter(Client.language.in_(languages))
-      if model_ids:
-        q = q.filter(Client.id.in_(model_ids))
-      q = q.order_by(File.client_id, File.session_id,
-                     File.claimed_id, File.shot_id)
-      retval += list(q)
-
-    if ('dev' in groups or 'eval' in groups):
-      if('enroll' in purposes):
-        q = self.query(File).join(Client).join((ProtocolPurpose, File.protocolPurposes)).join(Protocol).\
-            filter(and_(Protocol.name.in_(protocol), ProtocolPurpose.sgroup.in_(
-                groups), ProtocolPurpose.purpose == 'enroll'))
-        if model_ids:
-          q = q.filter(Client.id.in_(model_ids))
-        q = q.order_by(File.client_id, File.session_id,
-                       File.claimed_id, File.shot_id)
-        retval += list(q)
-
-      if('probe' in purposes):
-        if('client' in classes):
-          q = self.query(File).join(Client).join((ProtocolPurpose, File.protocolPurposes)).join(Protocol).\
-              filter(File.client_id == File.claimed_id).\
-              filter(and_(Protocol.name.in_(protocol), ProtocolPurpose.sgroup.in_(
-                  groups), ProtocolPurpose.purpose == 'probe'))
-          if model_ids:
-            q = q.filter(Client.id.in_(model_ids))
-          q = q.order_by(File.client_id, File.session_id,
-                         File.claimed_id, File.shot_id)
-          retval += list(q)
-
-        if('impostor' in classes):
-          q = self.query(File).join(Client).join((ProtocolPurpose, File.protocolPurposes)).join(Protocol).\
-              filter(File.client_id != File.claimed_id).\
-              filter(and_(Protocol.name.in_(protocol), ProtocolPurpose.sgroup.in_(
-                  groups), ProtocolPurpose.purpose == 'probe'))
-          if model_ids:
-            q = q.filter(File.claimed_id.in_(model_ids))
-          q = q.order_by(File.client_id, File.session_id,
-                         File.claimed_id, File.shot_id)
-          retval += list(q)
-
-    return list(set(retval))  # To remove duplicates
+    # duplicated ids would only add bound parameters to the query
+    model_ids = tuple(set(model_ids))
+
+    # Now query the database, once for all the kinds of requested files;
+    # files that match several of them are only returned once
+    world = 'world' in groups
+    split = world and len(subworld) == 1
+    dev_eval = 'dev' in groups or 'eval' in groups
+    enroll = dev_eval and 'enroll' in purposes
+    probe = dev_eval and 'probe' in purposes
+    probe_client = probe and 'client' in classes
+    probe_impostor = probe and 'impostor' in classes
+    if not (world or enroll or probe_client or probe_impostor):
+      return None
+
+    params = {'protocol': list(protocol), 'groups': list(groups)}
+    if world:
+      params['languages'] = list(languages)
+    if split:
+      params['subworld'] = list(subworld)
+    if model_ids:
+      params['model_ids'] = list(model_ids)
+    # the structure of the query, which is part of the key of the cache
+    key = (world, split, enroll, probe_client, probe_impostor, bool(model_ids))
+
+    if paths_only:
+      bq = _bakery(lambda s: s.query(File.path))
+    else:
+      bq = _bakery(lambda s: s.query(File))
+    # the joins go through the association tables, since the backrefs (e.g.
+    # File.protocolPurposes) are only defined once the mappers are configured,
+    # which a query of File.path does not trigger
+    bq += lambda q: q.join(Client).\
+        join(protocolPurpose_file_association,
+             protocolPurpose_file_association.c.file_id == File.id).\
+        join(ProtocolPurpose,
+             ProtocolPurpose.id == protocolPurpose_file_association.c.protocolPurpose_id).\
+        join(Protocol)
+    if split:
+      # outer join, since only the world clients belong to a subworld
+      bq += lambda q: q.\
+          outerjoin(subworld_client_association,
+                    subworld_client_association.c.client_id == Client.id).\
+          outerjoin(Subworld,
+                    Subworld.id == subworld_client_association.c.subworld_id)
+    bq.add_criteria(lambda q: q.filter(_file_criteria(*key)), *key)
+    bq += lambda q: q.filter(Protocol.name.in_(bindparam('protocol', expanding=True))).\
+        distinct().\
+        order_by(File.client_id, File.session_id,
+                 File.claimed_id, File.shot_id)
+    if not (paths_only or stream):
+      # the client is taken from the join above, instead of one query per
+      # file; SQLAlchemy 1.4 refuses this joined eager load with yield_per()
+      bq += lambda q: q.options(contains_eager(File.real_client))
+    if load_purposes:
+      bq += lambda q: q.options(selectinload(File.protocolPurposes))
+    self.assert_validity()
+    return bq(self.m_session()).params(**params)
 
   def tobjects(self, protocol=None, model_ids=None, groups=None, languages=None):
     """Returns a set of Files for enrolling T-norm models for score
@@ -451,8 +728,8 @@ class Database(bob.db.base.SQLiteDatabase):
     Returns: A list of Files which have the given properties.
     """
 
-    groups = self.check_parameters_for_validity(
-        groups, "group", ('dev', 'eval'))
+    groups = self.__check_validity__(
+        groups, "group", _VALID_NORM_GROUPS, default=('dev', 'eval'))
     # g2 clients are used for normalizing g1 ones, etc.
     tgroups = []
     if 'dev' in groups:
@@ -486,8 +763,8 @@ class Database(bob.db.base.SQLiteDatabase):
     Returns: A list of Files which have the given properties.
     """
 
-    groups = self.check_parameters_for_validity(
-        groups, "group", ('dev', 'eval'))
+    groups = self.__check_validity__(
+        groups, "group", _VALID_NORM_GROUPS, default=('dev', 'eval'))
     # g2 clients are used for normalizing g1 ones, etc.
     zgroups = []
     if 'dev' in groups:
@@ -515,9 +792,9 @@ class Database(bob.db.base.SQLiteDatabase):
   def protocol_names(self):
     """Returns all registered protocol names"""
 
-    l = self.protocols()
-    retval = [str(k.name) for k in l]
-    return retval
+    if self._protocol_names is None:
+      self._protocol_names = [k for (k,) in self.query(Protocol.name).order_by(Protocol.id)]
+    return list(self._protocol_names)
 
   def protocols(self):
     """Returns all registered protocols"""
@@ -527,7 +804,7 @@ class Database(bob.db.base.SQLiteDatabase):
   def has_protocol(self, name):
     """Tells if a certain protocol is available"""
 
-    return self.query(Protocol).filter(Protocol.name == name).count() != 0
+    return self.query(exists().where(Protocol.name == name)).scalar()
 
   def protocol(self, name):
     """Returns the protocol object in the database given a certain name. Raises
@@ -52,6 +52,7 @@ def test_clients():
   assert len(db.clients(groups='eval')) == 26
   assert len(db.tclients(groups='dev')) == 26
   assert len(db.tclients(groups='eval')) == 26
+  assert len(db.zclients()) == 52
 
   assert len(db.clients(genders='f')) == 41
   assert len(db.clients(genders='m')) == 41
@@ -61,7 +62,17 @@ def test_clients():
 def test_objects():
   # tests if the right number of File objects is returned
   db = bob.db.banca.Database()
-  assert len(db.objects()) == 6540
+  files = db.objects()
+  assert len(files) == 6540
+  assert len(set(f.id for f in files)) == len(files)
+  assert [f.id for f in db.iter_objects(batch_size=100)] == [f.id for f in files]
+  # the clients and the protocol purposes are loaded with the files
+  assert all('real_client' in f.__dict__ and 'protocolPurposes' in f.__dict__ for f in files)
+  # files shared by several protocols and purposes are returned once, sorted
+  files = db.objects(groups=('world', 'dev'), purposes=('enroll', 'probe'))
+  keys = [(f.client_id, f.session_id, f.claimed_id, f.shot_id) for f in files]
+  assert len(set(f.id for f in files)) == len(files)
+  assert keys == sorted(keys)
   assert len(db.objects(groups='world')) == 300
   assert len(db.objects(groups='world', subworld='onethird')) == 100
   assert len(db.objects(groups='world', subworld='twothirds')) == 200
@@ -87,6 +98,41 @@ def test_objects():
         assert len(db.zobjects(groups=group, model_ids=model_id)) == 105
 
 
+@db_available
+def test_threads():
+  # Tests that more threads than a pool of connections would hold can query the database at once
+  import threading
+  db = bob.db.banca.Database()
+  n = 16
+  # keeps all threads (and their sessions) alive until all of them have queried
+  barrier = threading.Barrier(n + 1, timeout=60)
+  results = []
+  errors = []
+  def query():
+    try:
+      results.append(db.has_client_id(1001))
+    except Exception as e:
+      errors.append(e)
+    finally:
+      # a failing thread must not leave the others waiting at the barrier
+      barrier.wait()
+  threads = [threading.Thread(target=query) for _ in range(n)]
+  for t in threads: t.start()
+  barrier.wait()
+  for t in threads: t.join()
+  assert not errors, errors
+  assert results == [True] * n
+
+
+@db_available
+def test_pickle():
+  # Tests that an unpickled Database (e.g. sent to another process) can be queried
+  import pickle
+  db = pickle.loads(pickle.dumps(bob.db.banca.Database()))
+  assert len(db.clients(groups='world')) == 30
+  assert len(db.objects(groups='world')) == 300
+
+
 @db_available
 def test_annotations():
   # Tests that for all files the annotated eye positions exist and are in correct order
@@ -113,3 +159,29 @@ def test_driver_api():
   assert main('banca reverse 05/1021_f_g2_s05_1026_en_3 --self-test'.split()) == 0
   assert main('banca path 2327 --self-test'.split()) == 0
 
+
+@db_available
+def test_paths_reverse():
+  # Tests that paths and reverse preserve the order of the query and skip unknown entries
+  db = bob.db.banca.Database()
+  files = db.objects(groups='world')[:5]
+  ids = [f.id for f in reversed(files)]
+  stems = db.paths(ids + [-1])
+  assert stems == [f.path for f in reversed(files)]
+  assert [f.id for f in db.reverse(stems + ['non/existing'])] == ids
+  # the paths of a query are those of its files
+  files = db.objects(groups='dev', purposes='enroll')
+  assert db.paths_for(groups='dev', purposes='enroll', prefix='/data', suffix='.ppm') == \
+      [f.make_path('/data', '.ppm') for f in files]
+  files = db.objects(groups='world', subworld='onethird')
+  assert db.paths_for(groups='world', subworld='onethird') == [f.path for f in files]
+
+
+def test_make_path():
+  # make_path() builds the same paths as os.path.join()
+  import pathlib
+  from bob.db.banca.models import File
+  f = File(1, '05/1021_f_g2_s05_1026_en_3', 1021, 3, 5)
+  assert f.make_path() == '05/1021_f_g2_s05_1026_en_3'
+  for directory in ('data', 'data' + os.sep, 'data/', pathlib.Path('data')):
+    assert f.make_path(directory, '.ppm') == os.path.join(directory, f.path) + '.ppm'